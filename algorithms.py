@@ -1,46 +1,214 @@
+import functools
+from collections import deque
+
 from .components import FunctionalDependency, Attribute, Relvar
 
 
-def closure(attributes: set[Attribute], functional_dependencies: set[FunctionalDependency]) -> set[Attribute]:
-    """Calcula el cierre de un conjunto de atributos dado un conjunto de dependencias funcionales."""
-    closure_set = set(attributes)
-    changed = True
-    while changed:
-        changed = False
-        for fd in functional_dependencies:
-            if fd.determinant.issubset(closure_set) and not fd.dependant.issubset(closure_set):
-                closure_set.update(fd.dependant)
-                changed = True
-    return closure_set
+def _attribute_bits(attributes: set[Attribute], functional_dependencies: set[FunctionalDependency]) -> dict[Attribute, int]:
+    """Asigna un índice de bit a cada atributo que aparece en los conjuntos dados."""
+    bits = {}
+    for attribute in attributes:
+        bits.setdefault(attribute, len(bits))
+    for fd in functional_dependencies:
+        for attribute in fd.determinant | fd.dependant:
+            bits.setdefault(attribute, len(bits))
+    return bits
+
+
+def _attributes_mask(attributes: set[Attribute], bits: dict[Attribute, int]) -> int:
+    """Convierte un conjunto de atributos a su máscara de bits."""
+    mask = 0
+    for attribute in attributes:
+        mask |= 1 << bits[attribute]
+    return mask
+
+
+def _fd_masks(functional_dependencies: set[FunctionalDependency], bits: dict[Attribute, int]) -> tuple:
+    """Convierte cada dependencia funcional a un par de máscaras (determinante, dependiente),
+    descartando las triviales (dependiente contenido en el determinante), que nunca
+    aportan atributos al cierre."""
+    pairs = []
+    for fd in functional_dependencies:
+        determinant = _attributes_mask(fd.determinant, bits)
+        dependant = _attributes_mask(fd.dependant, bits) & ~determinant
+        if dependant:
+            pairs.append((determinant, dependant))
+    return tuple(pairs)
+
+
+def _single_bits(mask: int):
+    """Itera las máscaras de un solo bit contenidas en la máscara dada."""
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+@functools.lru_cache(maxsize=256)
+def _closure_tables(fd_masks: tuple) -> tuple:
+    """Precalcula, para un conjunto fijo de dependencias, las tuplas de determinantes y
+    dependientes junto con la lista de adyacencia bit -> dependencias que lo usan.
+    Estas tablas solo dependen de las dependencias, así que se comparten entre todas
+    las llamadas a _closure_mask sobre el mismo conjunto. Las dependencias se ordenan
+    por tamaño de determinante: las de determinante chico se disparan antes, con lo que
+    el corte por stop_mask llega más pronto."""
+    ordered = sorted(fd_masks, key=lambda pair: bin(pair[0]).count("1"))
+    determinants = tuple(determinant for determinant, _ in ordered)
+    dependants = tuple(dependant for _, dependant in ordered)
+    uses = {}
+    for fd_id, determinant in enumerate(determinants):
+        for bit in _single_bits(determinant):
+            uses.setdefault(bit, []).append(fd_id)
+    return determinants, dependants, uses
+
+
+@functools.lru_cache(maxsize=256)
+def _closure_for(fd_masks: tuple):
+    """Genera una función de cierre especializada para un conjunto fijo de dependencias:
+    las tablas de LinClosure quedan ligadas como variables de cierre, así que las
+    llamadas repetidas sobre el mismo conjunto no las reconstruyen ni las buscan."""
+    determinants, dependants, uses = _closure_tables(fd_masks)
+    uses_get = uses.get
+
+    def specialized(mask: int, stop_mask: int = None) -> int:
+        """Calcula el cierre con el algoritmo LinClosure: en vez de re-escanear todas las
+        dependencias hasta el punto fijo, lleva por dependencia la máscara de atributos
+        del determinante aún no alcanzados y por atributo la lista de dependencias que lo
+        usan, de modo que cada dependencia se dispara a lo más una vez. Si se da
+        stop_mask, regresa en cuanto el cierre lo cubre, sin terminar de expandirlo."""
+        closure_mask = mask
+        if stop_mask is not None and closure_mask & stop_mask == stop_mask:
+            return closure_mask
+        missing = []
+        pending = deque()
+
+        for fd_id, determinant in enumerate(determinants):
+            remaining = determinant & ~mask
+            missing.append(remaining)
+            if remaining == 0:
+                new_bits = dependants[fd_id] & ~closure_mask
+                closure_mask |= new_bits
+                if stop_mask is not None and closure_mask & stop_mask == stop_mask:
+                    return closure_mask
+                pending.extend(_single_bits(new_bits))
+
+        # ligaduras locales para abaratar el ciclo interno
+        popleft = pending.popleft
+        extend = pending.extend
+        while pending:
+            bit = popleft()
+            for fd_id in uses_get(bit, ()):
+                missing[fd_id] &= ~bit
+                if missing[fd_id] == 0:
+                    new_bits = dependants[fd_id] & ~closure_mask
+                    closure_mask |= new_bits
+                    if stop_mask is not None and closure_mask & stop_mask == stop_mask:
+                        return closure_mask
+                    extend(_single_bits(new_bits))
+
+        return closure_mask
+
+    return specialized
+
+
+@functools.lru_cache(maxsize=4096)
+def _closure_mask(mask: int, fd_masks: tuple, stop_mask: int = None) -> int:
+    """Calcula (y memoiza) el cierre de la máscara usando la función especializada
+    para el conjunto de dependencias dado."""
+    return _closure_for(fd_masks)(mask, stop_mask)
+
+
+def closure(attributes: set[Attribute], functional_dependencies: set[FunctionalDependency], stop: set[Attribute] = None) -> set[Attribute]:
+    """Calcula el cierre de un conjunto de atributos dado un conjunto de dependencias funcionales.
+    Si se da stop, la expansión se detiene en cuanto el cierre contiene a stop."""
+    bits = _attribute_bits(attributes if stop is None else attributes | stop, functional_dependencies)
+    stop_mask = None if stop is None else _attributes_mask(stop, bits)
+    mask = _closure_mask(_attributes_mask(attributes, bits), _fd_masks(functional_dependencies, bits), stop_mask)
+    return {attribute for attribute, bit in bits.items() if mask >> bit & 1}
 
 
 def is_superkey(attributes: set[Attribute], heading: set[Attribute], functional_dependencies: set[FunctionalDependency]) -> bool:
     """Determina si el conjunto de atributos es superllave (determina todo el encabezado)."""
-    return closure(attributes, functional_dependencies) == heading
+    bits = _attribute_bits(attributes | heading, functional_dependencies)
+    heading_mask = _attributes_mask(heading, bits)
+    closure_mask = _closure_mask(_attributes_mask(attributes, bits), _fd_masks(functional_dependencies, bits), heading_mask)
+    return closure_mask & heading_mask == heading_mask
 
 
 def is_key(attributes: set[Attribute], heading: set[Attribute], functional_dependencies: set[FunctionalDependency]) -> bool:
     """Determina si el conjunto de atributos es llave mínima (superllave irreductible)."""
-    if not is_superkey(attributes, heading, functional_dependencies):
+    bits = _attribute_bits(attributes | heading, functional_dependencies)
+    fd_masks = _fd_masks(functional_dependencies, bits)
+    heading_mask = _attributes_mask(heading, bits)
+    attributes_mask = _attributes_mask(attributes, bits)
+
+    if _closure_mask(attributes_mask, fd_masks, heading_mask) & heading_mask != heading_mask:
         return False
-    for attr in attributes:
-        reduced = attributes - {attr}
-        if is_superkey(reduced, heading, functional_dependencies):
+
+    # un atributo del encabezado que no aparece en ningún dependiente es esencial:
+    # ningún cierre lo alcanza, así que quitarlo rompe la superllave sin necesidad
+    # de calcular el cierre reducido
+    derivable_mask = 0
+    for _, dependant in fd_masks:
+        derivable_mask |= dependant
+    for attribute in attributes:
+        bit = 1 << bits[attribute]
+        if bit & heading_mask and not bit & derivable_mask:
+            continue
+        reduced_mask = attributes_mask & ~bit
+        if _closure_mask(reduced_mask, fd_masks, heading_mask) & heading_mask == heading_mask:
             return False
     return True
 
 
+def _is_mask_superkey(determinant_mask: int, relvar: Relvar, known_superkeys: list) -> bool:
+    """Verifica si la máscara es superllave de la relvar. Todo superconjunto de una
+    superllave ya demostrada lo es también, así que esos casos se resuelven sin
+    calcular el cierre."""
+    for superkey_mask in known_superkeys:
+        if superkey_mask & ~determinant_mask == 0:
+            return True
+    heading_mask = relvar.heading_mask
+    if _closure_mask(determinant_mask, relvar._fd_masks, heading_mask) & heading_mask != heading_mask:
+        return False
+    known_superkeys.append(determinant_mask)
+    return True
+
+
 def is_relvar_in_bcnf(relvar: Relvar):
-     """Verifica si una relvar está en forma normal de Boyce-Codd (BCNF)."""
+    """Verifica si una relvar está en forma normal de Boyce-Codd (BCNF)."""
+    known_superkeys = []
     for fd in relvar.functional_dependencies:
-        if not fd.is_trivial() and not is_superkey(fd.determinant, relvar.heading, relvar.functional_dependencies):
+        if fd.is_trivial():
+            continue
+        if not _is_mask_superkey(relvar._attributes_mask(fd.determinant), relvar, known_superkeys):
             return False
     return True
 
 
 def is_relvar_in_4nf(relvar: Relvar):
-     """Verifica si una relvar está en Cuarta Forma Normal (4NF)."""
-    for mvd in relvar.multivalued_dependencies:
-        if not mvd.is_trivial(relvar.heading) and not is_superkey(mvd.determinant, relvar.heading, relvar.functional_dependencies):
+    """Verifica si una relvar está en Cuarta Forma Normal (4NF)."""
+    known_superkeys = []
+    for determinant_mask in relvar._mvd_masks:
+        if not _is_mask_superkey(determinant_mask, relvar, known_superkeys):
             return False
     return True
+
+
+def is_relvar_in_bcnf_and_4nf(relvar: Relvar) -> tuple:
+    """Verifica BCNF y 4NF en una sola pasada, compartiendo entre ambas las superllaves
+    ya demostradas; muchas dependencias funcionales y multivaluadas repiten determinante."""
+    known_superkeys = []
+    in_bcnf = True
+    for fd in relvar.functional_dependencies:
+        if fd.is_trivial():
+            continue
+        if not _is_mask_superkey(relvar._attributes_mask(fd.determinant), relvar, known_superkeys):
+            in_bcnf = False
+            break
+    in_4nf = True
+    for determinant_mask in relvar._mvd_masks:
+        if not _is_mask_superkey(determinant_mask, relvar, known_superkeys):
+            in_4nf = False
+            break
+    return in_bcnf, in_4nf
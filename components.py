@@ -1,6 +1,6 @@
-import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import ClassVar
 
 from .exceptions import InvalidDependency, InvalidExpression
 
@@ -16,13 +16,25 @@ class Attribute:
     """
     name: str
 
+    # since instances are immutable, they are interned: constructing the same
+    # name twice returns the same object instead of allocating a new one
+    _instances: ClassVar[dict] = {}
+
+    def __new__(cls, name: str):
+        instance = cls._instances.get(name)
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instances[name] = instance
+        return instance
+
     def __str__(self) -> str:
         return self.name
 
 
 class Dependency(ABC):
     """Base abstract class for functional and multivalued dependencies."""
-    _CAPTURE_EXPRESSION: str
+    __slots__ = ("determinant", "dependant")
+
     _SEPARATOR: str
 
     def __init__(self, expression: str):
@@ -50,16 +62,39 @@ class Dependency(ABC):
     def __repr__(self) -> str:
         return self.__str__()
 
+    def __eq__(self, other) -> bool:
+        return (type(self) is type(other)
+                and self.determinant == other.determinant
+                and self.dependant == other.dependant)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.determinant, self.dependant))
+
     def _is_expression_valid(self, expression: str) -> bool:
-        clean_expression = expression.replace(" ", '')
-        return bool(re.fullmatch(self._CAPTURE_EXPRESSION, clean_expression))
+        # the expression was already stripped of spaces in __init__
+        sides = expression.split(self._SEPARATOR)
+        if len(sides) != 2:
+            return False
+        return all(Dependency._is_attribute_list_valid(side) for side in sides)
+
+    @staticmethod
+    def _is_attribute_list_valid(side: str) -> bool:
+        """Checks that a side of the expression looks like {name,name,...}, scanning the
+        string directly instead of matching a regular expression. Attribute names accept
+        the same character range ([A-z]) the original pattern did."""
+        if len(side) < 3 or side[0] != "{" or side[-1] != "}":
+            return False
+        for name in side[1:-1].split(","):
+            if not name or any(not "A" <= character <= "z" for character in name):
+                return False
+        return True
 
     @staticmethod
-    def _get_set_from_expression(expression: str) -> set:
-        expression = expression.replace(" ", '')
+    def _get_set_from_expression(expression: str) -> frozenset:
         expression = expression.strip("{}")
 
-        return set(Attribute(name) for name in expression.split(","))
+        # map evita el marco de generador intermedio al construir el conjunto
+        return frozenset(map(Attribute, expression.split(",")))
 
     @abstractmethod
     def is_trivial(self, *args, **kwargs) -> bool:
@@ -74,17 +109,26 @@ class Dependency(ABC):
 
 class FunctionalDependency(Dependency):
     """Class for functional dependencies."""
-    _CAPTURE_EXPRESSION = r"\{[A-z]+(?:,[A-z]+)*\}->\{[A-z]+(?:,[A-z]+)*\}"
+    __slots__ = ("_trivial",)
+
     _SEPARATOR = "->"
 
+    def __init__(self, expression: str):
+        super().__init__(expression)
+        self._trivial = None
+
     def is_trivial(self) -> bool:
         """Regresa True si la dependencia funcional es trivial, es decir, si el lado derecho esta contenido en el izquierdor."""
-        return self.dependant.issubset(self.determinant)
+        # los atributos son inmutables, así que el resultado se calcula una sola vez
+        if self._trivial is None:
+            self._trivial = self.dependant.issubset(self.determinant)
+        return self._trivial
 
 
 class MultivaluedDependency(Dependency):
     """Class for multivalued dependencies."""
-    _CAPTURE_EXPRESSION = r"\{[A-z]+(?:,[A-z]+)*\}->->\{[A-z]+(?:,[A-z]+)*\}"
+    __slots__ = ()
+
     _SEPARATOR = "->->"
 
     def is_trivial(self, heading: set[Attribute]) -> bool:
@@ -95,10 +139,16 @@ class MultivaluedDependency(Dependency):
 class Relvar:
     """Class for relvars."""
     def __init__(self, heading: [str], functional_dependencies: [FunctionalDependency] = None, multivalued_dependencies: [MultivaluedDependency] = None):
-        self.heading = set(Attribute(name) for name in heading)
+        self.heading = set(map(Attribute, heading))
         self.functional_dependencies = set()
         self.multivalued_dependencies = set()
 
+        # bit index per heading attribute, plus masks cached for the algorithms module
+        self._bits = {attribute.name: index for index, attribute in enumerate(self.heading)}
+        self.heading_mask = (1 << len(self._bits)) - 1
+        self._fd_masks = ()
+        self._mvd_masks = ()
+
         if functional_dependencies:
             for fd in functional_dependencies:
                 self.add_functional_dependency(fd)
@@ -113,9 +163,18 @@ class Relvar:
     def __repr__(self) -> str:
         return f"heading={repr(self.heading)}, functional_dependencies={repr(self.functional_dependencies)}"
 
+    def _attributes_mask(self, attributes: set) -> int:
+        """Returns the bitmask for a set of attributes taken from the relvar's heading."""
+        mask = 0
+        for attribute in attributes:
+            mask |= 1 << self._bits[attribute.name]
+        return mask
+
     def _validate_dependency(self, dependency: Dependency):
+        # membership is checked against the name -> bit dict, which works on plain
+        # strings and avoids hashing Attribute instances
         for attribute in dependency.determinant | dependency.dependant:
-            if attribute not in self.heading:
+            if attribute.name not in self._bits:
                 raise InvalidDependency(f"{attribute} is not contained in relvar's heading.")
 
     def add_functional_dependency(self, functional_dependency: FunctionalDependency):
@@ -130,8 +189,17 @@ class Relvar:
                 not present in the relvar's heading.
         """
         self._validate_dependency(functional_dependency)
+        if functional_dependency in self.functional_dependencies:
+            return
         self.functional_dependencies.add(functional_dependency)
 
+        # trivial dependencies never add attributes to a closure, so they are
+        # left out of the cached masks
+        determinant_mask = self._attributes_mask(functional_dependency.determinant)
+        dependant_mask = self._attributes_mask(functional_dependency.dependant) & ~determinant_mask
+        if dependant_mask:
+            self._fd_masks += ((determinant_mask, dependant_mask),)
+
     def add_multivalued_dependency(self, multivalued_dependency: MultivaluedDependency):
         """
                 Adds a multivalued dependency to the relvar's set of multivalued dependencies.
@@ -144,4 +212,14 @@ class Relvar:
                         not present in the relvar's heading.
                 """
         self._validate_dependency(multivalued_dependency)
+        if multivalued_dependency in self.multivalued_dependencies:
+            return
         self.multivalued_dependencies.add(multivalued_dependency)
+
+        # triviality only depends on the heading, which is fixed, so it is decided
+        # here with mask operations and trivial dependencies are left out of the
+        # cached masks the 4NF check consumes
+        determinant_mask = self._attributes_mask(multivalued_dependency.determinant)
+        dependant_mask = self._attributes_mask(multivalued_dependency.dependant)
+        if dependant_mask & ~determinant_mask and determinant_mask | dependant_mask != self.heading_mask:
+            self._mvd_masks += (determinant_mask,)